@@ -2,14 +2,21 @@ import streamlit as st
 import pandas as pd
 import datetime as dt
 import calendar
+import functools
+from collections import defaultdict
+from itertools import chain
+from operator import itemgetter
 from io import BytesIO
 from reportlab.lib.pagesizes import A3, landscape
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
 from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import Color, black, white
+from PIL import Image
 import textwrap
 import re
+import warnings
 import requests
 
 # -------------------------
@@ -17,6 +24,13 @@ import requests
 # -------------------------
 st.set_page_config(page_title="Care Home Monthly Calendar", layout="wide")
 
+# -------------------------
+# Precompiled patterns
+# -------------------------
+_TIME_RE = re.compile(r"^(\d{1,2})(?::?(\d{2}))?$")  # free-form time input
+_TIME_LINE = re.compile(r"^(\d{1,2}:\d{2}\s?(?:am|pm|AM|PM)?)\s?(.*)")  # "HH:MM Activity" cell line
+_TRAILING_NUM = re.compile(r"\s*\d+$")  # "Lucy 2" -> "Lucy"
+
 # -------------------------
 # Utility functions
 # -------------------------
@@ -29,34 +43,123 @@ def parse_csv(uploaded_file):
         st.error(f"CSV parse error: {e}")
         return None
 
+def str_column(df, name):
+    """Column as str() of each cell (NaN -> "nan"), or empty strings if the column is missing."""
+    if name not in df:
+        return pd.Series("", index=df.index)
+    # map(str), not astype(str): pandas 3's str dtype keeps NaN instead of stringifying it
+    return df[name].map(str)
+
+def _parse_one_date(value):
+    try:
+        ts = pd.to_datetime(value)
+    except Exception:
+        return None
+    return None if pd.isna(ts) else ts.date()
+
+def parse_date_column(col):
+    """pd.to_datetime for a whole column, keeping each row's own (local) date; bad rows -> NaT.
+
+    Timestamps with different UTC offsets (e.g. a rota spanning the clock change) can't form a
+    datetime64 column, so those fall back to parsing row by row.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)  # pandas' mixed-offset deprecation; handled below
+            dates = pd.to_datetime(col, errors="coerce", format="mixed")
+    except (ValueError, TypeError):
+        dates = None
+    if dates is None or not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(col.map(_parse_one_date))
+    return dates
+
+def normalize_time(t):
+    """'9', '9.30', '0930', '09 : 30' -> 'HH:MM'; anything else -> None."""
+    if not t or not isinstance(t, str):
+        return None
+    t2 = t.strip().lower().replace(".", ":").replace(" ", "")
+    match = _TIME_RE.match(t2)
+    if match:
+        hour, minute = match.groups()
+        hour = hour.zfill(2)
+        minute = minute if minute else "00"
+        return f"{hour}:{minute}"
+    return None
+
+def normalize_time_series(times):
+    """Vectorized normalize_time for a Series of strings (unmatched -> None)."""
+    t = times.str.strip().str.lower().str.replace(".", ":", regex=False).str.replace(" ", "", regex=False)
+    parts = t.str.extract(_TIME_RE)
+    out = parts[0].str.zfill(2) + ":" + parts[1].fillna("00")
+    # object dtype so unmatched entries really are None (pandas 3's str dtype would turn them into NaN)
+    return out.astype(object).where(parts[0].notna(), None)
+
+def event_sort_key(notes, time):
+    """Integer sort key: holidays, then staff shifts, then everything else, each by HH:MM (untimed last)."""
+    cat = 0 if notes == "Holiday" else 1 if notes == "staff shift" else 2
+    hhmm = 2359
+    if time:
+        h, _, m = time.partition(":")
+        if h.isdigit() and m.isdigit() and int(h) < 24 and int(m) < 60:
+            hhmm = int(h) * 100 + int(m)
+    return cat * 10000 + hhmm
+
+# Lower-case 3-letter weekday names, indexed by date.weekday()
+_DOW3 = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+@functools.lru_cache(maxsize=64)
+def _monthrange(year: int, month: int):
+    return calendar.monthrange(year, month)
+
+@functools.lru_cache(maxsize=64)
+def _monthcalendar(year: int, month: int):
+    """calendar.monthcalendar as an immutable tuple of week tuples, so the cached value can't be mutated."""
+    return tuple(tuple(week) for week in calendar.monthcalendar(year, month))
+
 def month_date_range(year: int, month: int):
     first = dt.date(year, month, 1)
-    last = dt.date(year, month, calendar.monthrange(year, month)[1])
+    last = dt.date(year, month, _monthrange(year, month)[1])
     return first, last
 
+class _CleanTable(dict):
+    """str.translate table that keeps ASCII and drops any other unmapped code point.
+
+    Misses are memoised, so after warm-up every lookup is a plain dict hit.
+    """
+    def __missing__(self, codepoint):
+        value = codepoint if codepoint < 0x80 else None
+        self[codepoint] = value
+        return value
+
+# Built once at import: clean_text runs for every holiday, shift, activity and PDF line
+_CLEAN_TABLE = _CleanTable({c: c for c in range(0x80)})
+_CLEAN_TABLE.update(str.maketrans({
+    "\u2013": "-", "\u2014": "-",
+    "\u2018": "'", "\u2019": "'",
+    "\u201c": '"', "\u201d": '"',
+    "\u2026": "...", "\xa0": " ",
+}))
+
 def clean_text(s):
     if not isinstance(s, str):
         s = str(s) if s is not None else ""
-    replacements = {
-        "\u2013": "-", "\u2014": "-",
-        "\u2018": "'", "\u2019": "'",
-        "\u201c": '"', "\u201d": '"',
-        "\u2026": "...", "\xa0": " ",
-    }
-    for bad, good in replacements.items():
-        s = s.replace(bad, good)
-    s = re.sub(r"[^\x00-\x7F]+", "", s)
-    return s.strip()
+    # Replacements and the non-ASCII strip in one translate pass
+    return s.translate(_CLEAN_TABLE).strip()
 
 # -------------------------
 # Holiday fetcher
 # -------------------------
+@st.cache_data(ttl=86400, show_spinner=False)
+def _fetch_gov_uk_json():
+    """Fetch the full gov.uk bank holidays feed (all regions, all years), cached for a day."""
+    resp = requests.get("https://www.gov.uk/bank-holidays.json", timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
 def fetch_uk_bank_holidays(year, month):
     """Fetch UK national bank holidays for the given year/month."""
     try:
-        resp = requests.get("https://www.gov.uk/bank-holidays.json", timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        data = _fetch_gov_uk_json()
     except Exception as e:
         st.warning(f"Could not fetch UK bank holidays: {e}")
         return []
@@ -97,134 +200,169 @@ def fetch_awareness_days(year, month):
 # Core: Build calendar day mapping
 # -------------------------
 def seat_activity_into_calendar(year, month, activities_df, rota_df, rules, include_holidays=True):
-    first, last = month_date_range(year, month)
-    daymap = {first + dt.timedelta(days=i): [] for i in range((last - first).days + 1)}
-
-    # 1️⃣ Holidays (auto-fetch)
+    # Holidays are fetched outside the cache so a failed fetch (no holidays + warning) isn't memoised
+    combined_holidays = []
     if include_holidays:
-        seen_holidays = set()  # to track (date, normalized_title)
-
-        # Combine all sources
         combined_holidays = fetch_uk_bank_holidays(year, month) + fetch_awareness_days(year, month)
+    return _build_daymap(year, month, activities_df, rota_df, rules, combined_holidays)
 
-        for ev in combined_holidays:
-            d = ev["date"]
-            title_norm = clean_text(ev["title"]).strip().lower()
+# st.cache_data hashes the DataFrames, rules and holidays by content, so re-previewing an unchanged month is a cache hit
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_daymap(year, month, activities_df, rota_df, rules, combined_holidays):
+    first, last = month_date_range(year, month)
+    # Keyed by day of month while building; converted to dt.date keys on return
+    daymap = {day: [] for day in range(1, last.day + 1)}
+    first_wd = first.weekday()
 
-            # Skip duplicates by date + normalized title
-            if (d, title_norm) in seen_holidays:
-                continue
-            seen_holidays.add((d, title_norm))
+    # 1️⃣ Holidays (fetched by seat_activity_into_calendar)
+    if combined_holidays:
+        holidays_df = pd.DataFrame(combined_holidays)
+        holidays_df["norm"] = holidays_df["title"].map(clean_text).str.lower().str.strip()
+
+        # Skip duplicates by date + normalized title (first occurrence wins)
+        holidays_df = holidays_df.drop_duplicates(subset=["date", "norm"])
 
-            if d in daymap:
-                daymap[d].append({
+        for ev in holidays_df.itertuples(index=False):
+            d = ev.date
+            if d.year == year and d.month == month:
+                daymap[d.day].append({
                     "time": None,
-                    "title": ev["title"],
-                    "notes": "Holiday"
+                    "title": ev.title,
+                    "notes": "Holiday",
+                    "_key": event_sort_key("Holiday", None),
                 })
 
 
     # 2️⃣ Staff Shifts
-    if rota_df is not None:
-        for _, r in rota_df.iterrows():
-            try:
-                d = pd.to_datetime(r.get("date")).date()
-            except:
-                continue
-            if d in daymap:
-                staff = clean_text(str(r.get("staff", "")))
-                staff = re.sub(r"\s*\d+$", "", staff)
-                start = str(r.get("shift_start", "")).strip()
-                end = str(r.get("shift_end", "")).strip()
-                shift_time = f"({start} – {end})" if start and end else ""
-                display = f"{staff} {shift_time}".strip()
-                if display:
-                    daymap[d].append({"time": None, "title": display, "notes": "staff shift"})
+    if rota_df is not None and "date" in rota_df:
+        dates = parse_date_column(rota_df["date"])
+        in_month = (dates.dt.year == year) & (dates.dt.month == month)
+        staff = str_column(rota_df, "staff").map(clean_text).str.replace(_TRAILING_NUM, "", regex=True)
+        start = str_column(rota_df, "shift_start").str.strip()
+        end = str_column(rota_df, "shift_end").str.strip()
+        has_times = (start != "") & (end != "")
+        display = staff.where(~has_times, staff + " (" + start + " – " + end + ")").str.strip()
+        for day, disp in zip(dates.dt.day[in_month], display[in_month]):
+            if disp:
+                daymap[int(day)].append({"time": None, "title": disp, "notes": "staff shift",
+                                         "_key": event_sort_key("staff shift", None)})
 
     # 3️⃣ Fixed Weekly Rules
     fixed_rules = []
     for rule in rules:
-        for d in daymap:
-            if d.weekday() == rule["weekday"]:
-                fixed_rules.append({"date": d, "time": rule.get("time"), "title": clean_text(rule["title"]), "notes": "fixed"})
+        rule_time = normalize_time(rule.get("time"))
+        rule_title = clean_text(rule["title"])
+        for day in range(1 + (rule["weekday"] - first_wd) % 7, last.day + 1, 7):
+            fixed_rules.append({"day": day, "time": rule_time, "title": rule_title, "notes": "fixed"})
 
     # 4️⃣ Regular Activities
     activities = []
     if activities_df is not None:
-        for _, r in activities_df.iterrows():
-            name = clean_text(r.get("name") or r.get("activity_name") or "")
-            pref_days = str(r.get("preferred_days", "")).split(";")
-            pref_days = [p.strip()[:3].lower() for p in pref_days if p.strip()]
-            pref_time = str(r.get("preferred_time", "")).strip()
-            freq = int(r.get("frequency", 0)) if str(r.get("frequency", "")).isdigit() else 0
-            placed = 0
-            for d in sorted(daymap.keys()):
-                if freq and placed >= freq:
-                    break
-                dow3 = calendar.day_name[d.weekday()][:3].lower()
-                if dow3 in pref_days:
-                    activities.append({"date": d, "time": pref_time, "title": name, "notes": "activity"})
-                    placed += 1
-
-    # 5️⃣ Merge + Normalize Times + Deduplicate + Sort
-    time_pattern = re.compile(r"^(\d{1,2})(?::?(\d{2}))?$")
-    def normalize_time(t):
-        if not t or not isinstance(t, str):
-            return None
-        t2 = t.strip().lower().replace(".", ":").replace(" ", "")
-        match = time_pattern.match(t2)
-        if match:
-            hour, minute = match.groups()
-            hour = hour.zfill(2)
-            minute = minute if minute else "00"
-            return f"{hour}:{minute}"
-        return None
+        # Days of the month grouped by 3-letter weekday, in date order
+        dow_to_days = {
+            _DOW3[wd]: range(1 + (wd - first_wd) % 7, last.day + 1, 7)
+            for wd in range(7)
+        }
 
-    all_events = fixed_rules + activities
-    for ev in all_events:
-        ev["time"] = normalize_time(ev.get("time"))
+        names = activities_df["name"] if "name" in activities_df else pd.Series(None, index=activities_df.index, dtype=object)
+        if "activity_name" in activities_df:
+            names = names.fillna(activities_df["activity_name"])
+        names = names.fillna("").map(clean_text)
+        pref_times = normalize_time_series(str_column(activities_df, "preferred_time"))
+
+        # Blank / non-numeric / non-finite / negative frequency -> 0 (place on every preferred day);
+        # capped at 31 (no month has more days) before the int cast so huge values can't overflow
+        if "frequency" in activities_df:
+            freqs = pd.to_numeric(activities_df["frequency"], errors="coerce")
+            freqs = freqs.replace([float("inf"), float("-inf")], 0).fillna(0).clip(0, 31).astype(int).to_numpy()
+        else:
+            freqs = [0] * len(activities_df)
+
+        for name, days_raw, pref_time, freq in zip(
+            names, str_column(activities_df, "preferred_days"), pref_times, freqs
+        ):
+            pref_days = [p.strip()[:3].lower() for p in days_raw.split(";") if p.strip()]
+            candidates = sorted(set(chain.from_iterable(dow_to_days.get(p, ()) for p in pref_days)))
+            activities.extend(
+                {"day": day, "time": pref_time, "title": name, "notes": "activity"}
+                for day in (candidates[:freq] if freq else candidates)
+            )
+
+    # 5️⃣ Merge + Deduplicate + Sort (times already normalized above)
+    # (day, normalized title) -> times already on that day, and the keys that have a proper HH:MM time
+    seen_times = defaultdict(set)
+    has_proper = set()
+    for d, events in daymap.items():
+        for e in events:
+            seen_times[d, e["title"].lower().strip()].add(e["time"])
 
+    all_events = fixed_rules + activities
     for ev in all_events:
-        d = ev["date"]
-        if d not in daymap:
-            continue
-        title_norm = ev["title"].lower().strip()
+        d = ev["day"]
+        key = (d, ev["title"].lower().strip())
         time_norm = ev.get("time")
-        duplicates = [e for e in daymap[d] if e["title"].lower().strip() == title_norm]
-        if duplicates:
-            has_exact = any(e.get("time") == time_norm for e in duplicates)
-            has_proper = any(e.get("time") and len(e.get("time")) == 5 for e in duplicates)
-            if has_exact or (has_proper and not time_norm):
-                continue
-        daymap[d].append({"time": time_norm, "title": ev["title"], "notes": ev["notes"]})
+        if time_norm in seen_times[key] or (key in has_proper and not time_norm):
+            continue
+        seen_times[key].add(time_norm)
+        if time_norm and len(time_norm) == 5:
+            has_proper.add(key)
+        daymap[d].append({"time": time_norm, "title": ev["title"], "notes": ev["notes"],
+                          "_key": event_sort_key(ev["notes"], time_norm)})
 
-    def sort_key(e):
-        t = e.get("time")
-        if not t:
-            return dt.time(23, 59)
-        try:
-            h, m = map(int, t.split(":"))
-            return dt.time(h, m)
-        except:
-            return dt.time(23, 59)
-
-    for d in daymap:
-        daymap[d].sort(key=lambda e: (
-            0 if e["notes"] == "Holiday" else
-            1 if e["notes"] == "staff shift" else
-            2, sort_key(e)
-        ))
-    return daymap
+    for events in daymap.values():
+        events.sort(key=itemgetter("_key"))
+    return {dt.date(year, month, day): events for day, events in daymap.items()}
 
 # (— rest of your draw_calendar_pdf and Streamlit UI code unchanged — as in your existing)
 # You would paste the draw_calendar_pdf definition here and the Streamlit UI as you already have.
 
 
 
+# Shared wrappers for cell text (~31 chars per line, ~28 for bold holiday lines)
+_WRAP31 = textwrap.TextWrapper(width=31)
+_WRAP28 = textwrap.TextWrapper(width=28)
+
+def wrap_text(text, wrapper):
+    """wrapper.wrap(text), skipping the wrapper when that would be a no-op.
+
+    Only for short, printable text: tabs and other control characters still need the wrapper's
+    whitespace handling (clean_text keeps ASCII control characters).
+    """
+    if len(text) <= wrapper.width and text.isprintable():
+        return [text]
+    return wrapper.wrap(text)
+
+# A3 landscape at ~200 dpi; anything larger only inflates the PDF
+BACKGROUND_MAX_PX = (3300, 2340)
+
+# st.cache_data is shared by every session on the server, so keep it small and short-lived
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def prepare_background(background_bytes):
+    """Downscale an uploaded background to BACKGROUND_MAX_PX and re-encode as JPEG; small images pass through."""
+    im = Image.open(BytesIO(background_bytes))
+    if im.width <= BACKGROUND_MAX_PX[0] and im.height <= BACKGROUND_MAX_PX[1]:
+        return background_bytes
+    im.thumbnail(BACKGROUND_MAX_PX, Image.LANCZOS)
+    # JPEG has no alpha: flatten transparency onto white, which is what mask="auto" over the page showed
+    if im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info):
+        im = im.convert("RGBA")
+        flat = Image.new("RGB", im.size, (255, 255, 255))
+        flat.paste(im, mask=im.getchannel("A"))
+        im = flat
+    out = BytesIO()
+    im.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+@functools.lru_cache(maxsize=512)
+def string_width(text, font, size):
+    """Cached pdfmetrics.stringWidth; day numbers, times and holiday lines repeat across cells."""
+    return pdfmetrics.stringWidth(text, font, size)
+
 def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_bytes=None):
     """Generate styled non-editable A3 calendar PDF with improved readability and formatting"""
     buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=landscape(A3))
+    # Compress page streams explicitly rather than relying on the rl_config default
+    c = canvas.Canvas(buffer, pagesize=landscape(A3), pageCompression=1)
     width, height = landscape(A3)
 
     # --------------------------
@@ -232,7 +370,7 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
     # --------------------------
     if background_bytes:
         try:
-            img = ImageReader(BytesIO(background_bytes))
+            img = ImageReader(BytesIO(prepare_background(background_bytes)))
             c.drawImage(img, 0, 0, width=width, height=height, preserveAspectRatio=False, mask="auto")
         except Exception as e:
             st.warning(f"Background load failed: {e}")
@@ -311,7 +449,29 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
     # --------------------------
     cream = Color(1, 1, 1, alpha=0.93)
     staff_blue = Color(0, 0.298, 0.6)
-    month_days = calendar.monthcalendar(year, month)
+    month_days = _monthcalendar(year, month)
+
+    # Only emit font / fill operators when they actually change (most sublines reuse the last style).
+    # target is the canvas or the cell's text object. Text-object code is buffered and only reaches the
+    # page stream at c.drawText(to), so one tracker is only valid while no canvas font/fill call is made
+    # between c.beginText() and c.drawText() (canvas lines/strokes in between are fine).
+    cur_font = cur_fill = None
+
+    def set_font(target, name, size):
+        nonlocal cur_font
+        if cur_font != (name, size):
+            target.setFont(name, size)
+            cur_font = (name, size)
+
+    def set_fill(target, color):
+        nonlocal cur_fill
+        if cur_fill is not color:
+            target.setFillColor(color)
+            cur_fill = color
+
+    def text_at(to, tx, ty, text):
+        to.setTextOrigin(tx, ty)
+        to.textOut(text)
 
     for r_idx, week in enumerate(month_days):
         for c_idx, day in enumerate(week):
@@ -323,20 +483,24 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
             y = bottom + (rows - 1 - r_idx) * row_h
 
             # Background + border
-            c.setFillColor(cream)
+            set_fill(c, cream)
             c.setStrokeColor(black)
             c.roundRect(x, y, col_w, row_h, 5, fill=1, stroke=1)
 
+            # All of the cell's text goes into one text object (one BT/ET); underlines stay on the canvas.
+            # Until c.drawText(to) below, use set_font/set_fill on `to` only, never on the canvas (see above).
+            to = c.beginText()
+
             # --- Date (top-right, bold)
-            c.setFont("Helvetica-Bold", 12)
-            c.setFillColor(black)
+            set_font(to, "Helvetica-Bold", 12)
+            set_fill(to, black)
 
             # Measure text width so it's properly aligned to the right margin of the cell
             day_str = str(day)
-            day_width = c.stringWidth(day_str, "Helvetica-Bold", 12)
+            day_width = string_width(day_str, "Helvetica-Bold", 12)
 
             # Position a few millimetres from the right edge and near the top
-            c.drawString(x + col_w - day_width - 3 * mm, y + row_h - 6 * mm, day_str)
+            text_at(to, x + col_w - day_width - 3 * mm, y + row_h - 6 * mm, day_str)
 
 
             # --- Prepare text
@@ -350,7 +514,7 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
                     continue
 
                 # wrap long lines safely at ~31 characters
-                wrapped_lines = textwrap.wrap(line, width=31)
+                wrapped_lines = wrap_text(line, _WRAP31)
                 for subline in wrapped_lines:
                     subline = subline.strip()
                     if not subline:
@@ -359,9 +523,9 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
                     # 🔹 Holiday lines — bold, left-aligned, wrapped, and underlined
                     # 🔹 Holiday lines — bold, left-aligned, wrapped, and precisely underlined
                     if subline.isupper():
-                        c.setFont("Helvetica-Bold", 8.7)
-                        c.setFillColor(black)
-                        wrapped_holiday = textwrap.wrap(subline, width=28)
+                        set_font(to, "Helvetica-Bold", 8.7)
+                        set_fill(to, black)
+                        wrapped_holiday = wrap_text(subline, _WRAP28)
 
                         for wh in wrapped_holiday:
                             wh = wh.strip()
@@ -369,10 +533,10 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
                                 continue
 
                             # Draw text
-                            c.drawString(x + 2 * mm, text_y, wh)
+                            text_at(to, x + 2 * mm, text_y, wh)
 
                             # Draw underline exactly matching the text width
-                            text_width = c.stringWidth(wh, "Helvetica-Bold", 8.7)
+                            text_width = string_width(wh, "Helvetica-Bold", 8.7)
                             underline_y = text_y - 0.5 * mm
                             c.line(x + 2 * mm, underline_y, x + 2 * mm + text_width, underline_y)
 
@@ -386,31 +550,31 @@ def draw_calendar_pdf(title, disclaimer, year, month, cell_texts, background_byt
 
                     # 🔹 Staff (italic, blue)
                     if subline.lower().startswith("staff:"):
-                        c.setFont("Helvetica-Oblique", 10.5)
-                        c.setFillColor(staff_blue)
-                        c.drawString(x + 2 * mm, text_y, subline)
+                        set_font(to, "Helvetica-Oblique", 10.5)
+                        set_fill(to, staff_blue)
+                        text_at(to, x + 2 * mm, text_y, subline)
                         text_y -= line_spacing
                         continue
 
                     # 🔹 Activities (bold time, normal text)
-                    time_match = re.match(r"^(\d{1,2}:\d{2}\s?(?:am|pm|AM|PM)?)\s?(.*)", subline)
+                    time_match = _TIME_LINE.match(subline)
                     if time_match:
                         time_part, rest = time_match.groups()
-                        c.setFont("Helvetica-Bold", 10.5)
-                        c.setFillColor(black)
-                        c.drawString(x + 2 * mm, text_y, time_part)
-                        time_width = c.stringWidth(time_part + " ", "Helvetica-Bold", 9.5)
-                        c.setFont("Helvetica-Bold", 10.5)
-                        c.drawString(x + 2 * mm + time_width, text_y, rest)
+                        set_font(to, "Helvetica-Bold", 10.5)
+                        set_fill(to, black)
+                        text_at(to, x + 2 * mm, text_y, time_part)
+                        time_width = string_width(time_part + " ", "Helvetica-Bold", 9.5)
+                        text_at(to, x + 2 * mm + time_width, text_y, rest)
                     else:
-                        c.setFont("Helvetica-Bold", 10.5)
-                        c.setFillColor(black)
-                        c.drawString(x + 2 * mm, text_y, subline)
+                        set_font(to, "Helvetica-Bold", 10.5)
+                        set_fill(to, black)
+                        text_at(to, x + 2 * mm, text_y, subline)
 
                     text_y -= line_spacing
                     if text_y < y + 4 * mm:
                         break
 
+            c.drawText(to)
 
     c.save()
     buffer.seek(0)
@@ -483,7 +647,7 @@ for line in fixed_rules_text.splitlines():
         day = parts[1][:3].lower()
         time = parts[2] if len(parts) > 2 else ""
         title_txt = parts[0]
-        weekday = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"].index(day)
+        weekday = _DOW3.index(day)
         rules.append({"weekday": weekday, "time": time, "title": title_txt})
 
 include_holidays = st.checkbox("Include UK National Holidays", True)
@@ -494,11 +658,21 @@ include_holidays = st.checkbox("Include UK National Holidays", True)
 
 # Create a unique session key for each (year, month) combo
 session_key = f"{year}-{month:02d}"
+grid_key = f"{session_key}_grid"
+edits_key = f"{session_key}_edits"
+
+def apply_grid_edits(session_key, grid_key, edits_key):
+    """data_editor on_change: copy edited cells into the month's date -> text dict used for the PDF."""
+    dates = list(st.session_state[session_key])
+    edits = st.session_state[edits_key]
+    for row, changes in st.session_state[grid_key]["edited_rows"].items():
+        if "content" in changes:
+            edits[dates[int(row)]] = changes["content"] or ""
 
 if st.button("Preview Calendar"):
     with st.spinner("Generating preview..."):
         daymap = seat_activity_into_calendar(year, month, activities_df, rota_df, rules, include_holidays)
-        st.session_state[session_key] = {}
+        preview_texts = {}
 
         for d, events in daymap.items():
             lines = []
@@ -510,44 +684,58 @@ if st.button("Preview Calendar"):
                 elif ev["notes"] in ("fixed", "activity"):
                     t = ev.get("time", "")
                     lines.append(f"{t} {ev['title']}".strip())
-            st.session_state[session_key][d] = "\n".join(lines)
+            preview_texts[d] = "\n".join(lines)
+
+        # Changed content means a fresh grid (its identity includes the data), so start the edits over too
+        if st.session_state.get(session_key) != preview_texts:
+            st.session_state[session_key] = preview_texts
+            st.session_state[edits_key] = dict(preview_texts)
+            st.session_state.pop(grid_key, None)
 
 # Editable preview (only for currently selected month)
 if session_key in st.session_state:
     st.subheader(f"📝 Edit Calendar for {calendar.month_name[month]} {year} Before Generating PDF")
-    month_days = calendar.monthcalendar(year, month)
-
-    for week in month_days:
-        cols = st.columns(7)
-        for c_idx, day in enumerate(week):
-            if day == 0:
-                with cols[c_idx]:
-                    st.markdown(" ")
-                continue
-            d = dt.date(year, month, day)
-            with cols[c_idx]:
-                st.text_area(
-                    f"{day}",
-                    st.session_state[session_key].get(d, ""),
-                    key=f"{session_key}_{d}",
-                    height=180,
-                )
+    preview_texts = st.session_state[session_key]
+
+    # Streamlit drops a widget's state whenever it isn't rendered (e.g. after switching months),
+    # so the grid comes back unedited; reset the edits to match instead of keeping invisible ones.
+    if grid_key not in st.session_state:
+        st.session_state[edits_key] = dict(preview_texts)
+
+    # One grid row per day (a single frontend component instead of a text area per day)
+    preview_df = pd.DataFrame({
+        "day": [d.day for d in preview_texts],
+        "weekday": [calendar.day_abbr[d.weekday()] for d in preview_texts],
+        "content": list(preview_texts.values()),
+    })
+    st.data_editor(
+        preview_df,
+        key=grid_key,
+        on_change=apply_grid_edits,
+        args=(session_key, grid_key, edits_key),
+        num_rows="fixed",
+        hide_index=True,
+        disabled=["day", "weekday"],
+        column_config={
+            "day": st.column_config.NumberColumn("Day", width="small"),
+            "weekday": st.column_config.TextColumn("", width="small"),
+            "content": st.column_config.TextColumn("Events (one per line)", width="large"),
+        },
+    )
 
     # Optional reset button for this month’s edits
     if st.button("🔄 Reset This Month's Edits"):
         st.session_state.pop(session_key, None)
+        st.session_state.pop(grid_key, None)
+        st.session_state.pop(edits_key, None)
         st.rerun()
 
     # Generate PDF button
     if st.button("Generate PDF"):
         bg_bytes = bg_file.read() if bg_file else None
 
-        # Gather edited text areas for this month only
-        edited_texts = {
-            dt.date.fromisoformat(k.split("_")[-1]): v
-            for k, v in st.session_state.items()
-            if k.startswith(session_key + "_")
-        }
+        # Kept current by apply_grid_edits, so this is a single dict read
+        edited_texts = st.session_state[edits_key]
 
         pdf_buf = draw_calendar_pdf(
             title, disclaimer, year, month, edited_texts, background_bytes=bg_bytes